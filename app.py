@@ -1,103 +1,84 @@
 import streamlit as st
 import json
-from datetime import datetime, date, timedelta
-import math
-from icalendar import Calendar, Event
+import orjson
+import functools
+from datetime import datetime
 from io import BytesIO
-import unittest
 import os
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+import mediremind_io
+from mediremind_core import Evt, build_calendar, collect_import_errors, next_event, parse_hms, parse_iso, validate_appointment, validate_medication
 
 st.set_page_config(page_title="MediRemind", layout="wide")
 
 @st.cache_data
-def load_data() -> Dict:
-    try:
-        with open('mediremind_data.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
+def load_data(mtime: float) -> Dict:
+    if not os.path.exists(mediremind_io.DATA_PATH):
         st.error("Data file not found. Starting with empty data.")
-        return {"medications": [], "appointments": []}
-    except json.JSONDecodeError:
+        return mediremind_io.empty_data()
+    try:
+        return mediremind_io.load_data()
+    except orjson.JSONDecodeError:
         st.error("Error parsing JSON file. Please check the format.")
-        return {"medications": [], "appointments": []}
+        return mediremind_io.empty_data()
 
 def save_data(data: Dict) -> None:
     try:
-        with open('mediremind_data.json', 'w') as f:
-            json.dump(data, f, indent=4)
+        mediremind_io.save_data(data)
+        st.session_state.data_dirty = False
     except Exception as e:
+        st.session_state.pop('pending_toast', None)
         st.error(f"Error saving data: {e}")
-
-def validate_medication(med: Dict) -> Tuple[bool, str]:
-    if not med['name'].strip():
-        return False, "Medication name cannot be empty"
-    if 'stock' in med:
-        if med['stock']['current_quantity'] < 0:
-            return False, "Current quantity cannot be negative"
-        if med['stock']['consumption_rate'] <= 0:
-            return False, "Consumption rate must be positive"
-        if med['stock']['alert_threshold'] < 0:
-            return False, "Alert threshold cannot be negative"
-    return True, ""
-
-def validate_appointment(appt: Dict) -> Tuple[bool, str]:
-    try:
-        datetime.fromisoformat(appt['date_time'])
-    except ValueError:
-        return False, "Invalid date/time format"
-    return True, ""
-
-def get_next_reminder(med: Dict) -> datetime:
-    schedule_time = datetime.strptime(med['schedule'], '%H:%M:%S').time()
-    today = datetime.now()
-    next_reminder = datetime.combine(today.date(), schedule_time)
-    if next_reminder < today:
-        next_reminder += timedelta(days=1)
-    return next_reminder
-
-def generate_calendar(data: Dict, selected_meds: List[str] = None) -> BytesIO:
-    cal = Calendar()
-    meds = [med for med in data['medications'] if not selected_meds or med['name'] in selected_meds]
-    
-    for med in meds:
-        event = Event()
-        event.add('summary', f'Take {med["name"]}')
-        event.add('dtstart', get_next_reminder(med))
-        frequency = st.session_state.get(f'freq_{med["name"]}', "daily")
-        if frequency == "every_other_day":
-            event.add('rrule', {'freq': 'daily', 'interval': 2})
-        elif frequency == "weekly":
-            event.add('rrule', {'freq': 'weekly', 'byday': 'MO'})
-        else:
-            event.add('rrule', {'freq': 'daily'})
-        cal.add_component(event)
-        
-        if 'stock' in med:
-            current_quantity = med['stock']['current_quantity']
-            consumption_rate = med['stock']['consumption_rate']
-            alert_threshold = med['stock']['alert_threshold']
-            if consumption_rate > 0 and current_quantity > alert_threshold:
-                days_until_low = math.ceil((current_quantity - alert_threshold) / consumption_rate)
-                notification_date = date.today() + timedelta(days=days_until_low)
-                stock_event = Event()
-                stock_event.add('summary', f'Refill {med["name"]}')
-                stock_event.add('dtstart', datetime(notification_date.year, notification_date.month, notification_date.day))
-                cal.add_component(stock_event)
-    
-    for appt in data['appointments']:
-        event = Event()
-        event.add('summary', appt.get('description', 'Doctor Appointment'))
-        event.add('dtstart', datetime.fromisoformat(appt['date_time']))
-        cal.add_component(event)
-    
-    ics_file = BytesIO()
-    ics_file.write(cal.to_ical())
-    ics_file.seek(0)
-    return ics_file
+        return
+    pending_toast = st.session_state.pop('pending_toast', None)
+    if pending_toast:
+        st.toast(pending_toast)
+
+def mark_dirty(toast: Optional[str] = None) -> None:
+    st.session_state.data_dirty = True
+    if toast:
+        st.session_state.pending_toast = toast
+
+def _current_minute() -> datetime:
+    return datetime.now().replace(second=0, microsecond=0)
+
+@st.cache_data(max_entries=32)
+def _generate_calendar_bytes(data_json: str, now: datetime, selected_meds: Tuple[str, ...] = (), frequencies: Tuple[Tuple[str, str], ...] = ()) -> bytes:
+    return build_calendar(json.loads(data_json), now, selected_meds, dict(frequencies))
+
+def generate_calendar(data: Dict, selected_meds: List[str] = None, now: Optional[datetime] = None) -> BytesIO:
+    frequencies = tuple(sorted(
+        (med['name'], st.session_state.get(f'freq_{med["name"]}', "daily"))
+        for med in data['medications']
+    ))
+    ics_bytes = _generate_calendar_bytes(
+        json.dumps(data, sort_keys=True),
+        now or _current_minute(),
+        tuple(sorted(selected_meds or ())),
+        frequencies,
+    )
+    return BytesIO(ics_bytes)
+
+@st.cache_data(ttl=60)
+def _next_event(data_json: str, now: datetime) -> Optional[Evt]:
+    return next_event(json.loads(data_json), now)
+
+@st.cache_data(max_entries=8)
+def _export_bytes(data: Dict) -> bytes:
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+@functools.lru_cache(maxsize=None)
+def _med_keys(idx: int) -> Tuple[str, ...]:
+    return (f"name_{idx}", f"schedule_{idx}", f"quantity_{idx}", f"rate_{idx}", f"threshold_{idx}", f"remove_stock_{idx}", f"add_stock_{idx}", f"delete_med_{idx}")
+
+@functools.lru_cache(maxsize=None)
+def _appt_keys(idx: int) -> Tuple[str, ...]:
+    return (f"date_{idx}", f"time_{idx}", f"desc_{idx}", f"delete_appt_{idx}")
 
 if 'data' not in st.session_state:
-    st.session_state.data = load_data()
+    st.session_state.data = load_data(os.path.getmtime(mediremind_io.DATA_PATH) if os.path.exists(mediremind_io.DATA_PATH) else 0.0)
+    st.session_state.data_dirty = False
 
 st.sidebar.title("MediRemind Navigation")
 selected_page = st.sidebar.selectbox("Select a page", ["Home", "Medications", "Doctor Appointments", "Generate Calendar", "Help", "Export/Import"])
@@ -105,60 +86,42 @@ selected_page = st.sidebar.selectbox("Select a page", ["Home", "Medications", "D
 if selected_page == "Home":
     st.title("MediRemind - Home")
     st.markdown('<div role="region" aria-label="Upcoming Events Summary">', unsafe_allow_html=True)
-    upcoming_events = []
-    for med in st.session_state.data['medications']:
-        next_reminder = get_next_reminder(med)
-        upcoming_events.append({
-            'start_time': next_reminder,
-            'summary': f'Take {med["name"]}'
-        })
-        if 'stock' in med:
-            current_quantity = med['stock']['current_quantity']
-            consumption_rate = med['stock']['consumption_rate']
-            alert_threshold = med['stock']['alert_threshold']
-            if consumption_rate > 0 and current_quantity > alert_threshold:
-                days_until_low = math.ceil((current_quantity - alert_threshold) / consumption_rate)
-                notification_date = date.today() + timedelta(days=days_until_low)
-                upcoming_events.append({
-                    'start_time': datetime(notification_date.year, notification_date.month, notification_date.day),
-                    'summary': f'Refill {med["name"]}'
-                })
-    for appt in st.session_state.data['appointments']:
-        date_time = datetime.fromisoformat(appt['date_time'])
-        upcoming_events.append({
-            'start_time': date_time,
-            'summary': appt.get('description', 'Doctor Appointment')
-        })
-    upcoming_events.sort(key=lambda x: x['start_time'])
-    if upcoming_events:
-        st.write("Next event:", upcoming_events[0]['summary'], "at", upcoming_events[0]['start_time'].strftime('%Y-%m-%d %H:%M'))
+    now = _current_minute()
+    upcoming = _next_event(json.dumps(st.session_state.data, sort_keys=True), now)
+    if upcoming:
+        st.write("Next event:", upcoming.summary, "at", upcoming.start_time.strftime('%Y-%m-%d %H:%M'))
     st.markdown('</div>', unsafe_allow_html=True)
 
 elif selected_page == "Medications":
     st.title("Medications")
     for idx, med in enumerate(st.session_state.data['medications']):
+        name_k, sched_k, qty_k, rate_k, thr_k, remove_stock_k, add_stock_k, delete_k = _med_keys(idx)
+        freq_k = f'freq_{med["name"]}'
         with st.expander(med['name'], expanded=False):
-            new_name = st.text_input("Name", value=med['name'], key=f"name_{idx}", help="Enter the medication name")
-            schedule_time = st.time_input("Schedule Time", value=datetime.strptime(med['schedule'], '%H:%M:%S').time(), key=f"schedule_{idx}", help="Set the time to take this medication")
-            frequency = st.selectbox("Reminder Frequency", ["daily", "every_other_day", "weekly"], key=f"freq_{med['name']}", help="Choose how often to be reminded")
-            st.session_state[f'freq_{med["name"]}'] = frequency
+            new_name = st.text_input("Name", value=med['name'], key=name_k, help="Enter the medication name")
+            schedule_time = st.time_input("Schedule Time", value=parse_hms(med['schedule']), key=sched_k, help="Set the time to take this medication")
+            frequency = st.selectbox("Reminder Frequency", ["daily", "every_other_day", "weekly"], key=freq_k, help="Choose how often to be reminded")
+            st.session_state[freq_k] = frequency
             if 'stock' in med:
-                current_quantity = st.number_input("Current Quantity", value=med['stock']['current_quantity'], min_value=0, key=f"quantity_{idx}", help="Number of pills currently available")
-                consumption_rate = st.number_input("Consumption Rate (per day)", value=med['stock']['consumption_rate'], min_value=0, key=f"rate_{idx}", help="How many pills you take daily")
-                alert_threshold = st.number_input("Alert Threshold", value=med['stock']['alert_threshold'], min_value=0, key=f"threshold_{idx}", help="Notify when stock falls below this amount")
-                if st.button("Remove Stock Information", key=f"remove_stock_{idx}"):
+                current_quantity = st.number_input("Current Quantity", value=med['stock']['current_quantity'], min_value=0, key=qty_k, help="Number of pills currently available")
+                consumption_rate = st.number_input("Consumption Rate (per day)", value=med['stock']['consumption_rate'], min_value=0, key=rate_k, help="How many pills you take daily")
+                alert_threshold = st.number_input("Alert Threshold", value=med['stock']['alert_threshold'], min_value=0, key=thr_k, help="Notify when stock falls below this amount")
+                if st.button("Remove Stock Information", key=remove_stock_k):
                     del med['stock']
+                    mark_dirty()
             else:
-                if st.button("Add Stock Information", key=f"add_stock_{idx}"):
+                if st.button("Add Stock Information", key=add_stock_k):
                     med['stock'] = {
                         "current_quantity": 0,
                         "consumption_rate": 0,
                         "alert_threshold": 0
                     }
-            if st.button("Delete Medication", key=f"delete_med_{idx}"):
+                    mark_dirty()
+            if st.button("Delete Medication", key=delete_k):
                 st.session_state.data['medications'].pop(idx)
+                mark_dirty()
             med['name'] = new_name
-            med['schedule'] = schedule_time.strftime('%H:%M:%S')
+            med['schedule'] = schedule_time.isoformat(timespec='seconds')
             is_valid, error = validate_medication(med)
             if not is_valid:
                 st.error(error)
@@ -168,6 +131,7 @@ elif selected_page == "Medications":
             "schedule": "00:00:00"
         }
         st.session_state.data['medications'].append(new_med)
+        mark_dirty()
     if st.button("Save Changes"):
         has_errors = False
         for med in st.session_state.data['medications']:
@@ -176,18 +140,20 @@ elif selected_page == "Medications":
                 st.error(error)
                 has_errors = True
         if not has_errors:
-            save_data(st.session_state.data)
-            st.toast("Changes saved successfully")
+            mark_dirty(toast="Changes saved successfully")
 
 elif selected_page == "Doctor Appointments":
     st.title("Doctor Appointments")
     for idx, appt in enumerate(st.session_state.data['appointments']):
+        date_k, time_k, desc_k, delete_k = _appt_keys(idx)
+        dt = parse_iso(appt['date_time'])
         with st.expander(appt.get('description', 'Appointment'), expanded=False):
-            date_input = st.date_input("Date", value=datetime.fromisoformat(appt['date_time']).date(), key=f"date_{idx}", help="Select the appointment date")
-            time_input = st.time_input("Time", value=datetime.fromisoformat(appt['date_time']).time(), key=f"time_{idx}", help="Select the appointment time")
-            description = st.text_area("Description", value=appt.get('description', ''), key=f"desc_{idx}", help="Describe the appointment purpose")
-            if st.button("Delete Appointment", key=f"delete_appt_{idx}"):
+            date_input = st.date_input("Date", value=dt.date(), key=date_k, help="Select the appointment date")
+            time_input = st.time_input("Time", value=dt.time(), key=time_k, help="Select the appointment time")
+            description = st.text_area("Description", value=appt.get('description', ''), key=desc_k, help="Describe the appointment purpose")
+            if st.button("Delete Appointment", key=delete_k):
                 st.session_state.data['appointments'].pop(idx)
+                mark_dirty()
             new_datetime = datetime.combine(date_input, time_input).isoformat()
             appt['date_time'] = new_datetime
             appt['description'] = description
@@ -200,6 +166,7 @@ elif selected_page == "Doctor Appointments":
             "description": ""
         }
         st.session_state.data['appointments'].append(new_appt)
+        mark_dirty()
     if st.button("Save Changes"):
         has_errors = False
         for appt in st.session_state.data['appointments']:
@@ -208,8 +175,7 @@ elif selected_page == "Doctor Appointments":
                 st.error(error)
                 has_errors = True
         if not has_errors:
-            save_data(st.session_state.data)
-            st.toast("Changes saved successfully")
+            mark_dirty(toast="Changes saved successfully")
 
 elif selected_page == "Generate Calendar":
     st.title("Generate Calendar")
@@ -230,29 +196,23 @@ elif selected_page == "Generate Calendar":
 elif selected_page == "Export/Import":
     st.title("Data Export/Import")
     if st.button("Export Data"):
-        st.download_button("Download Data", json.dumps(st.session_state.data), "mediremind_data.json", "text/json")
+        st.download_button("Download Data", _export_bytes(st.session_state.data), "mediremind_data.json", "text/json")
         st.toast("Data exported successfully")
     uploaded_file = st.file_uploader("Import Data", type="json", help="Upload a JSON file to restore your data")
-    if uploaded_file:
+    if uploaded_file and uploaded_file.file_id != st.session_state.get('imported_file_id'):
         try:
-            new_data = json.load(uploaded_file)
+            new_data = orjson.loads(uploaded_file.getvalue())
             if not isinstance(new_data, dict) or 'medications' not in new_data or 'appointments' not in new_data:
                 st.error("Invalid data format. Please upload a valid MediRemind JSON file.")
-            st.stop()
-            for med in new_data['medications']:
-                is_valid, error = validate_medication(med)
-                if not is_valid:
-                    st.error(f"Invalid medication: {error}")
-                    st.stop()
-            for appt in new_data['appointments']:
-                is_valid, error = validate_appointment(appt)
-                if not is_valid:
-                    st.error(f"Invalid appointment: {error}")
-                    st.stop()
+                st.stop()
+            errors = collect_import_errors(new_data)
+            if errors:
+                st.error("\n\n".join(errors))
+                st.stop()
             st.session_state.data = new_data
-            save_data(st.session_state.data)
-            st.toast("Data imported successfully")
-        except json.JSONDecodeError:
+            st.session_state.imported_file_id = uploaded_file.file_id
+            mark_dirty(toast="Data imported successfully")
+        except orjson.JSONDecodeError:
             st.error("Invalid JSON file format")
         except Exception as e:
             st.error(f"Error importing data: {e}")
@@ -271,29 +231,5 @@ elif selected_page == "Help":
       - Use the calendar export to set reminders in your preferred app (e.g., Google Calendar).
     """)
 
-save_data(st.session_state.data)
-
-class TestMediRemind(unittest.TestCase):
-    def setUp(self):
-        self.test_data = {"medications": [], "appointments": []}
-    
-    def test_load_data_file_not_found(self):
-        if os.path.exists('mediremind_data.json'):
-            os.remove('mediremind_data.json')
-        result = load_data()
-        self.assertEqual(result, {"medications": [], "appointments": []})
-    
-    def test_validate_medication_invalid_name(self):
-        med = {"name": "", "schedule": "00:00:00"}
-        is_valid, error = validate_medication(med)
-        self.assertFalse(is_valid)
-        self.assertEqual(error, "Medication name cannot be empty")
-    
-    def test_validate_appointment_invalid_datetime(self):
-        appt = {"date_time": "invalid", "description": ""}
-        is_valid, error = validate_appointment(appt)
-        self.assertFalse(is_valid)
-        self.assertEqual(error, "Invalid date/time format")
-
-if __name__ == "__main__":
-    pass
+if st.session_state.data_dirty:
+    save_data(st.session_state.data)
@@ -0,0 +1,142 @@
+import functools
+import operator
+from datetime import datetime, date, time, timedelta, timezone
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+@functools.lru_cache(maxsize=512)
+def parse_hms(s: str) -> time:
+    return datetime.strptime(s, '%H:%M:%S').time()
+
+parse_iso = functools.lru_cache(maxsize=2048)(datetime.fromisoformat)
+
+@functools.lru_cache(maxsize=512)
+def _validate_medication_fields(name: str, stock: Optional[Tuple[Tuple[str, float], ...]]) -> Tuple[bool, str]:
+    if not name.strip():
+        return False, "Medication name cannot be empty"
+    if stock is not None:
+        stock = dict(stock)
+        if stock['current_quantity'] < 0:
+            return False, "Current quantity cannot be negative"
+        if stock['consumption_rate'] <= 0:
+            return False, "Consumption rate must be positive"
+        if stock['alert_threshold'] < 0:
+            return False, "Alert threshold cannot be negative"
+    return True, ""
+
+def validate_medication(med: Dict) -> Tuple[bool, str]:
+    stock = tuple(sorted(med['stock'].items())) if 'stock' in med else None
+    return _validate_medication_fields(med['name'], stock)
+
+def validate_appointment(appt: Dict) -> Tuple[bool, str]:
+    try:
+        parse_iso(appt['date_time'])
+    except ValueError:
+        return False, "Invalid date/time format"
+    return True, ""
+
+def collect_import_errors(data: Dict) -> List[str]:
+    return [
+        f"Invalid medication: {error}"
+        for is_valid, error in map(validate_medication, data['medications'])
+        if not is_valid
+    ] + [
+        f"Invalid appointment: {error}"
+        for is_valid, error in map(validate_appointment, data['appointments'])
+        if not is_valid
+    ]
+
+def get_next_reminder(med: Dict, now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.now()
+    next_reminder = datetime.combine(now.date(), parse_hms(med['schedule']))
+    return next_reminder + timedelta(days=1) if next_reminder <= now else next_reminder
+
+def stock_refill_days(meds: List[Dict]) -> np.ndarray:
+    stocks = [med.get('stock', {}) for med in meds]
+    qty = np.array([stock.get('current_quantity', 0) for stock in stocks], dtype='float64')
+    rate = np.array([stock.get('consumption_rate', 0) for stock in stocks], dtype='float64')
+    thr = np.array([stock.get('alert_threshold', 0) for stock in stocks], dtype='float64')
+    mask = (rate > 0) & (qty > thr)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days = np.where(mask, np.ceil((qty - thr) / rate), -1)
+    return days.astype('int64')
+
+_ICS_EVENT = "BEGIN:VEVENT\r\n{lines}END:VEVENT\r\n"
+_RRULE_TABLE = {
+    "daily": "FREQ=DAILY",
+    "every_other_day": "FREQ=DAILY;INTERVAL=2",
+    "weekly": "FREQ=WEEKLY;BYDAY=MO",
+}
+_DEFAULT_RRULE = _RRULE_TABLE["daily"]
+
+def _ics_text(value: str) -> str:
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+def _ics_fold(line: str, limit: int = 75) -> str:
+    if len(line) < limit and line.isascii():
+        return line + '\r\n'
+    folded = []
+    byte_count = 0
+    for char in line:
+        char_len = len(char.encode('utf-8'))
+        byte_count += char_len
+        if byte_count >= limit:
+            folded.append('\r\n ')
+            byte_count = char_len
+        folded.append(char)
+    folded.append('\r\n')
+    return ''.join(folded)
+
+def _ics_dtstart(value: date) -> str:
+    if not isinstance(value, datetime):
+        return f"DTSTART;VALUE=DATE:{value.strftime('%Y%m%d')}"
+    if value.tzinfo is not None:
+        return f"DTSTART:{value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
+    return f"DTSTART:{value.strftime('%Y%m%dT%H%M%S')}"
+
+def _ics_event(summary: str, start: date, rrule: Optional[str] = None) -> str:
+    lines = _ics_fold(f"SUMMARY:{_ics_text(summary)}") + _ics_fold(_ics_dtstart(start))
+    if rrule:
+        lines += f"RRULE:{rrule}\r\n"
+    return _ICS_EVENT.format(lines=lines)
+
+def build_calendar(data: Dict, now: datetime, selected_meds: Tuple[str, ...] = (), frequencies: Optional[Dict[str, str]] = None) -> bytes:
+    frequencies = frequencies or {}
+    meds = [med for med in data['medications'] if not selected_meds or med['name'] in selected_meds]
+    today = now.date()
+    events = []
+    
+    for med, days_until_low in zip(meds, stock_refill_days(meds).tolist()):
+        rrule = _RRULE_TABLE.get(frequencies.get(med['name']), _DEFAULT_RRULE)
+        events.append(_ics_event(f'Take {med["name"]}', get_next_reminder(med, now), rrule))
+        
+        if days_until_low >= 0:
+            notification_date = today + timedelta(days=days_until_low)
+            events.append(_ics_event(f'Refill {med["name"]}', notification_date))
+    
+    events.extend(
+        _ics_event(appt.get('description', 'Doctor Appointment'), parse_iso(appt['date_time']))
+        for appt in data['appointments']
+    )
+    
+    return ("BEGIN:VCALENDAR\r\n" + "".join(events) + "END:VCALENDAR\r\n").encode('utf-8')
+
+class Evt(NamedTuple):
+    start_time: datetime
+    summary: str
+
+def iter_events(data: Dict, now: datetime) -> Iterator[Evt]:
+    today = now.date()
+    meds = data['medications']
+    for med, days_until_low in zip(meds, stock_refill_days(meds).tolist()):
+        yield Evt(get_next_reminder(med, now), f'Take {med["name"]}')
+        if days_until_low >= 0:
+            notification_date = today + timedelta(days=days_until_low)
+            yield Evt(datetime(notification_date.year, notification_date.month, notification_date.day), f'Refill {med["name"]}')
+    for appt in data['appointments']:
+        yield Evt(parse_iso(appt['date_time']), appt.get('description', 'Doctor Appointment'))
+
+def next_event(data: Dict, now: datetime) -> Optional[Evt]:
+    return min(iter_events(data, now), key=operator.itemgetter(0), default=None)
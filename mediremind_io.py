@@ -0,0 +1,28 @@
+import os
+from typing import Dict
+
+import orjson
+
+DATA_PATH = 'mediremind_data.json'
+TMP_SUFFIX = '.tmp'
+
+def empty_data() -> Dict:
+    return {"medications": [], "appointments": []}
+
+def load_data(path: str = DATA_PATH) -> Dict:
+    try:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return empty_data()
+
+def save_data(data: Dict, path: str = DATA_PATH) -> None:
+    tmp_path = path + TMP_SUFFIX
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(data))
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
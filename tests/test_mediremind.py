@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta, timezone
+
+import mediremind_io
+from mediremind_core import _ics_dtstart, _ics_event, _ics_fold, _ics_text, build_calendar, collect_import_errors, get_next_reminder, next_event, validate_appointment, validate_medication
+
+class TestMediRemind(unittest.TestCase):
+    def setUp(self):
+        self.test_data = {"medications": [], "appointments": []}
+
+    def test_load_data_file_not_found(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            result = mediremind_io.load_data(path=os.path.join(tmp_dir, 'mediremind_data.json'))
+        self.assertEqual(result, {"medications": [], "appointments": []})
+
+    def test_save_data_failure_removes_temp_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'mediremind_data.json')
+            with self.assertRaises(TypeError):
+                mediremind_io.save_data({"medications": [object()], "appointments": []}, path=path)
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+    def test_validate_medication_invalid_name(self):
+        med = {"name": "", "schedule": "00:00:00"}
+        is_valid, error = validate_medication(med)
+        self.assertFalse(is_valid)
+        self.assertEqual(error, "Medication name cannot be empty")
+
+    def test_validate_appointment_invalid_datetime(self):
+        appt = {"date_time": "invalid", "description": ""}
+        is_valid, error = validate_appointment(appt)
+        self.assertFalse(is_valid)
+        self.assertEqual(error, "Invalid date/time format")
+
+    def test_validate_medication_stock_errors(self):
+        cases = [
+            ({"current_quantity": -1, "consumption_rate": 1, "alert_threshold": 0}, "Current quantity cannot be negative"),
+            ({"current_quantity": 10, "consumption_rate": 0, "alert_threshold": 0}, "Consumption rate must be positive"),
+            ({"current_quantity": 10, "consumption_rate": 1, "alert_threshold": -1}, "Alert threshold cannot be negative"),
+        ]
+        for stock, message in cases:
+            with self.subTest(message=message):
+                med = {"name": "A", "schedule": "08:00:00", "stock": stock}
+                self.assertEqual(validate_medication(med), (False, message))
+
+    def test_validate_medication_cached_row_with_changed_stock(self):
+        med = {"name": "A", "schedule": "08:00:00", "stock": {"current_quantity": 10, "consumption_rate": 1, "alert_threshold": 2}}
+        self.assertEqual(validate_medication(med), (True, ""))
+        med['stock']['consumption_rate'] = 0
+        self.assertEqual(validate_medication(med), (False, "Consumption rate must be positive"))
+        med['stock']['consumption_rate'] = 1
+        self.assertEqual(validate_medication(med), (True, ""))
+        del med['stock']
+        self.assertEqual(validate_medication(med), (True, ""))
+
+    def test_collect_import_errors_reports_every_error(self):
+        data = {
+            "medications": [
+                {"name": "", "schedule": "00:00:00"},
+                {"name": "A", "schedule": "08:00:00"},
+                {"name": "B", "schedule": "08:00:00", "stock": {"current_quantity": -1, "consumption_rate": 1, "alert_threshold": 0}},
+            ],
+            "appointments": [
+                {"date_time": "2025-03-15T10:00:00", "description": ""},
+                {"date_time": "invalid", "description": ""},
+            ],
+        }
+        self.assertEqual(collect_import_errors(data), [
+            "Invalid medication: Medication name cannot be empty",
+            "Invalid medication: Current quantity cannot be negative",
+            "Invalid appointment: Invalid date/time format",
+        ])
+
+    def test_collect_import_errors_valid_payload(self):
+        data = {"medications": [{"name": "A", "schedule": "08:00:00"}], "appointments": [{"date_time": "2025-03-15T10:00:00"}]}
+        self.assertEqual(collect_import_errors(data), [])
+
+    def test_get_next_reminder_rolls_over_at_schedule_time(self):
+        self.assertEqual(get_next_reminder({'schedule': '08:00:00'}, datetime(2025, 1, 1, 8, 0)), datetime(2025, 1, 2, 8, 0))
+        self.assertEqual(get_next_reminder({'schedule': '08:00:00'}, datetime(2025, 1, 1, 7, 59)), datetime(2025, 1, 1, 8, 0))
+
+    def test_next_event_returns_earliest(self):
+        now = datetime(2025, 3, 15, 9, 0)
+        data = {
+            "medications": [
+                {"name": "A", "schedule": "08:00:00", "stock": {"current_quantity": 3, "consumption_rate": 1, "alert_threshold": 2}},
+                {"name": "B", "schedule": "20:00:00"},
+            ],
+            "appointments": [{"date_time": "2025-03-15T12:00:00", "description": "Check-up"}],
+        }
+        self.assertEqual(next_event(data, now), (datetime(2025, 3, 15, 12, 0), "Check-up"))
+        data["appointments"][0]["date_time"] = "2025-03-20T12:00:00"
+        self.assertEqual(next_event(data, now), (datetime(2025, 3, 15, 20, 0), "Take B"))
+        data["medications"].pop()
+        self.assertEqual(next_event(data, now), (datetime(2025, 3, 16, 0, 0), "Refill A"))
+
+    def test_next_event_empty_data(self):
+        self.assertIsNone(next_event({"medications": [], "appointments": []}, datetime(2025, 3, 15, 9, 0)))
+
+class TestCalendar(unittest.TestCase):
+    def test_ics_text_escaping(self):
+        self.assertEqual(_ics_text('a\\b;c,d\ne\r\nf'), 'a\\\\b\\;c\\,d\\ne\\nf')
+
+    def test_ics_fold_at_74_75_76_octets(self):
+        self.assertEqual(_ics_fold('a' * 74), 'a' * 74 + '\r\n')
+        self.assertEqual(_ics_fold('a' * 75), 'a' * 74 + '\r\n a\r\n')
+        self.assertEqual(_ics_fold('a' * 76), 'a' * 74 + '\r\n aa\r\n')
+
+    def test_ics_fold_multibyte(self):
+        self.assertEqual(_ics_fold('a' * 73 + '\u00e9'), 'a' * 73 + '\r\n \u00e9\r\n')
+        self.assertEqual(_ics_fold('\u00e9' * 40), '\u00e9' * 37 + '\r\n ' + '\u00e9' * 3 + '\r\n')
+
+    def test_ics_dtstart_date_and_datetime(self):
+        self.assertEqual(_ics_dtstart(date(2025, 4, 1)), 'DTSTART;VALUE=DATE:20250401')
+        self.assertEqual(_ics_dtstart(datetime(2025, 2, 27, 13, 18, 38, 915687)), 'DTSTART:20250227T131838')
+
+    def test_ics_dtstart_aware_datetime_is_converted_to_utc(self):
+        cet = timezone(timedelta(hours=1))
+        self.assertEqual(_ics_dtstart(datetime(2025, 3, 15, 10, 0, tzinfo=cet)), 'DTSTART:20250315T090000Z')
+        self.assertEqual(_ics_dtstart(datetime(2025, 3, 15, 10, 0, tzinfo=timezone.utc)), 'DTSTART:20250315T100000Z')
+
+    def test_ics_event(self):
+        self.assertEqual(
+            _ics_event('Take A', datetime(2025, 3, 15, 8, 0), 'FREQ=DAILY'),
+            'BEGIN:VEVENT\r\nSUMMARY:Take A\r\nDTSTART:20250315T080000\r\nRRULE:FREQ=DAILY\r\nEND:VEVENT\r\n',
+        )
+
+    def test_build_calendar(self):
+        data = {
+            "medications": [
+                {"name": "A", "schedule": "08:00:00", "stock": {"current_quantity": 30, "consumption_rate": 1, "alert_threshold": 5}},
+                {"name": "B", "schedule": "06:30:00"},
+                {"name": "C", "schedule": "21:00:00"},
+            ],
+            "appointments": [{"date_time": "2025-03-20T10:00:00", "description": "Check-up, annual"}],
+        }
+        now = datetime(2025, 3, 15, 7, 0)
+        result = build_calendar(data, now, ("A", "B"), {"B": "weekly"})
+        self.assertEqual(result, (
+            b'BEGIN:VCALENDAR\r\n'
+            b'BEGIN:VEVENT\r\nSUMMARY:Take A\r\nDTSTART:20250315T080000\r\nRRULE:FREQ=DAILY\r\nEND:VEVENT\r\n'
+            b'BEGIN:VEVENT\r\nSUMMARY:Refill A\r\nDTSTART;VALUE=DATE:20250409\r\nEND:VEVENT\r\n'
+            b'BEGIN:VEVENT\r\nSUMMARY:Take B\r\nDTSTART:20250316T063000\r\nRRULE:FREQ=WEEKLY;BYDAY=MO\r\nEND:VEVENT\r\n'
+            b'BEGIN:VEVENT\r\nSUMMARY:Check-up\\, annual\r\nDTSTART:20250320T100000\r\nEND:VEVENT\r\n'
+            b'END:VCALENDAR\r\n'
+        ))
+
+if __name__ == "__main__":
+    unittest.main()